@@ -3,53 +3,109 @@ AI helper module for InSitu vocabulary app.
 Handles Claude API calls for word explanations and examples.
 """
 
+import asyncio
+import bisect
+import functools
+import hashlib
+import json
 import os
 import re
-from anthropic import Anthropic
-from dotenv import load_dotenv
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+from database import get_cached_explanation, cache_explanation
 
-# Load environment variables
-load_dotenv()
+# anthropic and dotenv are imported lazily so pages that never call Claude
+# (e.g. the Vocab Bank) don't pay for them at startup
+if TYPE_CHECKING:
+    from anthropic import Anthropic, AsyncAnthropic
 
 # Initialize Anthropic client
 client = None
 
+_env_loaded = False
 
-def get_client() -> Anthropic:
+
+def _load_env_once():
+    """Load environment variables from .env the first time they're needed."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_client() -> "Anthropic":
     """Get or create the Anthropic client."""
     global client
     if client is None:
+        _load_env_once()
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+        from anthropic import Anthropic
         client = Anthropic(api_key=api_key)
     return client
 
 
+def explain_model() -> str:
+    """Model used for full word explanations (INSITU_EXPLAIN_MODEL overrides)."""
+    _load_env_once()
+    return os.getenv("INSITU_EXPLAIN_MODEL", DEFAULT_EXPLAIN_MODEL)
+
+
+def refresh_model() -> str:
+    """Model used for refreshing example sentences (INSITU_REFRESH_MODEL overrides)."""
+    _load_env_once()
+    return os.getenv("INSITU_REFRESH_MODEL", DEFAULT_REFRESH_MODEL)
+
+
+# Precompiled patterns for markdown stripping
+_MD_HEADING_RE = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_MD_BOLD_ITALIC_RE = re.compile(r'\*{3}(.+?)\*{3}')
+_MD_BOLD_STAR_RE = re.compile(r'\*{2}(.+?)\*{2}')
+_MD_BOLD_UNDERSCORE_RE = re.compile(r'__(.+?)__')
+_MD_ITALIC_STAR_RE = re.compile(r'\*(.+?)\*')
+_MD_ITALIC_UNDERSCORE_RE = re.compile(r'(?<!\w)_(.+?)_(?!\w)')
+_MD_INLINE_CODE_RE = re.compile(r'`(.+?)`')
+_MD_CODE_BLOCK_RE = re.compile(r'```.*?```', re.DOTALL)
+_EXCESS_NEWLINES_RE = re.compile(r'\n{3,}')
+
+# Characters (and runs of characters) that end a sentence
+_SENTENCE_TERMINATORS = ".!?"
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+
+# Precompiled patterns for response parsing
+_DEF_RE = re.compile(r'DEFINITION:\s*\n(.+?)(?=\n\nEXAMPLES:|$)', re.DOTALL)
+_EX_BLOCK_RE = re.compile(r'EXAMPLES:\s*\n(.+?)(?=\n\nSOURCE_CONTEXT:|$)', re.DOTALL)
+_EX_ITEM_RE = re.compile(r'\d+\.\s*(.+?)(?=\n\d+\.|$)', re.DOTALL)
+_SRC_RE = re.compile(r'SOURCE_CONTEXT:\s*\n(.+?)$', re.DOTALL)
+_PARTIAL_DEF_RE = re.compile(r'"definition"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
 def strip_markdown(text: str) -> str:
     """Remove common markdown formatting from text to produce plain text."""
     if not text:
         return text
     # Remove heading markers (# ## ### etc. at start of lines)
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    text = _MD_HEADING_RE.sub('', text)
     # Remove bold+italic markers (***text***)
-    text = re.sub(r'\*{3}(.+?)\*{3}', r'\1', text)
+    text = _MD_BOLD_ITALIC_RE.sub(r'\1', text)
     # Remove bold markers (**text**)
-    text = re.sub(r'\*{2}(.+?)\*{2}', r'\1', text)
+    text = _MD_BOLD_STAR_RE.sub(r'\1', text)
     # Remove bold markers (__text__)
-    text = re.sub(r'__(.+?)__', r'\1', text)
+    text = _MD_BOLD_UNDERSCORE_RE.sub(r'\1', text)
     # Remove italic markers (*text*)
-    text = re.sub(r'\*(.+?)\*', r'\1', text)
+    text = _MD_ITALIC_STAR_RE.sub(r'\1', text)
     # Remove italic markers (_text_) but not underscores within words
-    text = re.sub(r'(?<!\w)_(.+?)_(?!\w)', r'\1', text)
+    text = _MD_ITALIC_UNDERSCORE_RE.sub(r'\1', text)
     # Remove inline code backticks
-    text = re.sub(r'`(.+?)`', r'\1', text)
+    text = _MD_INLINE_CODE_RE.sub(r'\1', text)
     # Remove code block fences
-    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
+    text = _MD_CODE_BLOCK_RE.sub('', text)
     # Normalize double-double quotes to single double quotes
     text = text.replace('""', '"')
     # Clean up excess whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = _EXCESS_NEWLINES_RE.sub('\n\n', text)
     return text.strip()
 
 
@@ -59,21 +115,151 @@ Explain words clearly and give examples rooted in everyday London/UK life contex
 
 IMPORTANT: Do NOT use any markdown formatting in your response. No bold markers (**), no italic markers (*), no headings (#), no code blocks or backticks (`). Write everything in plain text only. Use standard quotation marks normally (single pair of double quotes, not double-double quotes).
 
-When explaining a word, always respond in this exact format:
+When explaining a word, respond ONLY with valid JSON on a single line, with no preamble, no code fences and no indentation, in this exact shape:
+
+{"definition": "Your 1-2 sentence definition in plain English", "examples": ["First example sentence using UK/London context", "Second example sentence using UK/London context", "Third example sentence using UK/London context"], "source_context": "If you find the word in the provided source text, the sentence where it appears. If not found, null."}
+
+After the JSON, write END on its own line."""
+
+
+REFRESH_SYSTEM_PROMPT = "You are a helpful English tutor specializing in UK/London contexts. Generate practical, relatable example sentences. Do NOT use any markdown formatting - write in plain text only."
+
+
+BATCH_SYSTEM_PROMPT = """You are a friendly English tutor helping a non-native English speaker living in London. 
+Explain words clearly and give examples rooted in everyday London/UK life contexts 
+(transport, work, weather, food, bureaucracy). Keep explanations concise but warm.
+
+IMPORTANT: Do NOT use any markdown formatting in your response. Write everything in plain text only.
+
+You will be given a numbered list of words. Respond ONLY with a valid JSON array containing one object per word, in the same order, with no preamble, no code fences and no indentation:
+[{"definition": "1-2 sentence definition in plain English", "examples": ["first UK/London example", "second", "third"], "source_context": "the sentence from the source text where the word appears, or null if not found"}]
+
+After the JSON array, write END on its own line."""
+
+# Models used for full explanations and for refreshing example sentences;
+# refreshing only needs three short sentences, so it uses the smaller model
+DEFAULT_EXPLAIN_MODEL = "claude-sonnet-4-6"
+DEFAULT_REFRESH_MODEL = "claude-haiku-4-5"
+
+# Output budget per explained word; a full JSON explanation is ~200-300 tokens
+MAX_TOKENS = 400
+
+# The prompts ask Claude to end each response with an END line
+STOP_SEQUENCES = ["\nEND"]
+
+# Upper bound on words per batched lookup, keeping each call reasonably quick
+MAX_BATCH_SIZE = 8
+
+# Batch requests per lookup before any words still missing are looked up singly
+MAX_BATCH_ATTEMPTS = 2
+
+# Upper bound on concurrent Claude requests when refreshing several words
+MAX_CONCURRENT_REQUESTS = 8
+
+# Source texts shorter than this are sent to Claude whole rather than windowed
+FULL_SOURCE_TEXT_LIMIT = 512
+
+# Roughly the shortest prompt prefix (~1024 tokens) the API will cache; a
+# cache_control marker on anything shorter is ignored, so the system prompts
+# alone and most windowed passages are never marked
+MIN_CACHEABLE_SOURCE_CHARS = 4096
+
+# Bump to invalidate cached explanations after prompt or format changes
+CACHE_VERSION = 1
+
+
+def source_text_hash(source_text: str) -> str:
+    """Short content hash of a source text, for use in cache keys."""
+    return hashlib.blake2b(source_text.encode(), digest_size=16).hexdigest()
+
+
+def explanation_cache_key(word: str, source_text: str = "") -> str:
+    """Build the explanation cache key for a word looked up against a source text."""
+    return f"{CACHE_VERSION}:{word.lower()}:{source_text_hash(source_text)}"
+
+
+def build_user_content(query: str, source_text: str = "") -> list[dict]:
+    """
+    Build the user message content blocks for a lookup.
+    
+    The source text goes first. When it is long enough to be cached, it is
+    marked cacheable so repeat lookups against the same document reuse the
+    cached prompt prefix.
+    """
+    content = []
+    if source_text:
+        block = {
+            "type": "text",
+            "text": f'Source text where this word was found:\n"""\n{source_text}\n"""'
+        }
+        if len(source_text) >= MIN_CACHEABLE_SOURCE_CHARS:
+            block["cache_control"] = {"type": "ephemeral"}
+        content.append(block)
+    content.append({"type": "text", "text": query})
+    return content
+
+
+def api_error_message(error: Exception) -> str:
+    """Turn a Claude API exception into a user-facing error message."""
+    error_msg = str(error)
+    if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
+        return "Invalid API key. Please check your ANTHROPIC_API_KEY in the .env file."
+    elif "rate" in error_msg.lower():
+        return "Rate limit exceeded. Please wait a moment and try again."
+    else:
+        return f"Error calling Claude API: {error_msg}"
+
 
-DEFINITION:
-[Your 1-2 sentence definition in plain English]
+@functools.lru_cache(maxsize=256)
+def _word_pattern(word_lower: str) -> re.Pattern:
+    """Compile (and cache) a case-insensitive literal pattern for a word."""
+    return re.compile(re.escape(word_lower), re.IGNORECASE)
 
-EXAMPLES:
-1. [First example sentence using UK/London context]
-2. [Second example sentence using UK/London context]
-3. [Third example sentence using UK/London context]
 
-SOURCE_CONTEXT:
-[If you find the word in the provided source text, include the sentence where it appears. If not found, write "Not found in source text."]"""
+def _lower_same_length(source_text: str) -> str | None:
+    """Lowercase the text, or return None if that would change its length."""
+    lowered = source_text.lower()
+    return lowered if len(lowered) == len(source_text) else None
 
 
-def find_word_in_context(word: str, source_text: str) -> str | None:
+def build_text_index(source_text: str) -> dict:
+    """
+    Precompute the lookup structures for a source text.
+    
+    Build this once per uploaded text and pass it to find_word_in_context /
+    surrounding_sentences so each lookup skips re-scanning the text.
+    
+    Returns:
+        dict with:
+            lowered: the lowercased text, or None if lowercasing changed its length
+            starts/ends: offsets of each run of sentence terminators
+    """
+    runs = [m.span() for m in _SENTENCE_END_RE.finditer(source_text)]
+    return {
+        "lowered": _lower_same_length(source_text),
+        "starts": [start for start, _ in runs],
+        "ends": [end for _, end in runs]
+    }
+
+
+def _find_word(word: str, source_text: str, text_index: dict) -> tuple[int, int] | None:
+    """Find the (start, end) offsets of the first case-insensitive occurrence of a word."""
+    word_lower = word.lower()
+    lowered = text_index["lowered"]
+    
+    # Lowercasing a few non-ASCII characters changes the string length, which
+    # would shift the offsets; fall back to a case-insensitive regex then
+    if lowered is None:
+        match = _word_pattern(word_lower).search(source_text)
+        return match.span() if match else None
+    
+    start = lowered.find(word_lower)
+    if start == -1:
+        return None
+    return start, start + len(word_lower)
+
+
+def find_word_in_context(word: str, source_text: str, text_index: dict | None = None) -> str | None:
     """
     Find a sentence containing the word in the source text.
     
@@ -82,21 +268,160 @@ def find_word_in_context(word: str, source_text: str) -> str | None:
     if not source_text:
         return None
     
-    # Split into sentences (simple approach)
-    sentences = re.split(r'[.!?]+', source_text)
+    lookup_index = text_index if text_index is not None else {"lowered": _lower_same_length(source_text)}
+    span = _find_word(word, source_text, lookup_index)
     
-    word_lower = word.lower()
-    for sentence in sentences:
-        if word_lower in sentence.lower():
-            cleaned = sentence.strip()
-            if cleaned:
-                return cleaned
+    # Sentences run between terminators, so a match that spans a terminator
+    # (e.g. "e.g") isn't inside any one sentence
+    if span is None or _SENTENCE_END_RE.search(source_text, span[0], span[1]):
+        return None
+    
+    if text_index is None:
+        # One-off lookup: walk out from the match to the nearest terminators
+        # rather than indexing every sentence in the text
+        start = max(source_text.rfind(c, 0, span[0]) for c in _SENTENCE_TERMINATORS) + 1
+        ends = [i for i in (source_text.find(c, span[1]) for c in _SENTENCE_TERMINATORS) if i != -1]
+        end = min(ends) if ends else len(source_text)
+    else:
+        # Binary search for the sentence containing the match
+        starts, ends = text_index["starts"], text_index["ends"]
+        index = bisect.bisect_right(ends, span[0])
+        start = ends[index - 1] if index > 0 else 0
+        end = starts[index] if index < len(starts) else len(source_text)
+    
+    cleaned = source_text[start:end].strip()
+    return cleaned or None
+
+
+def surrounding_sentences(
+    word: str,
+    source_text: str,
+    window: int = 2,
+    text_index: dict | None = None
+) -> str:
+    """
+    Get the sentence containing the word plus `window` sentences either side.
+    
+    Short texts, and texts where the word isn't found, are returned whole.
+    """
+    if len(source_text) < FULL_SOURCE_TEXT_LIMIT:
+        return source_text
+    
+    if text_index is None:
+        text_index = build_text_index(source_text)
+    
+    span = _find_word(word, source_text, text_index)
+    if span is None:
+        return source_text
+    
+    ends = text_index["ends"]
+    index = bisect.bisect_right(ends, span[0])
+    
+    start = ends[index - window - 1] if index - window - 1 >= 0 else 0
+    end = ends[index + window] if index + window < len(ends) else len(source_text)
+    return source_text[start:end].strip()
+
+
+def load_json(response_text: str) -> dict:
+    """
+    Decode the JSON object in a Claude response.
+    
+    Any stray text before or after the object is ignored, including text
+    that itself contains braces.
+    Raises json.JSONDecodeError if no valid JSON object is found.
+    """
+    decoder = json.JSONDecoder()
+    start = response_text.find("{")
+    while start != -1:
+        try:
+            return decoder.raw_decode(response_text, start)[0]
+        except json.JSONDecodeError:
+            start = response_text.find("{", start + 1)
+    raise json.JSONDecodeError("No JSON found in response", response_text, 0)
+
+
+def _is_json_object(response_text: str) -> bool:
+    """Check whether a Claude response holds a decodable JSON object."""
+    try:
+        return isinstance(load_json(response_text), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def load_json_items(response_text: str) -> list:
+    """
+    Decode the complete items at the start of a JSON array in a Claude response.
+    
+    Unlike load_json(), this salvages a truncated or malformed array: items are
+    decoded in order until the first one that isn't complete valid JSON.
+    """
+    start = response_text.find("[")
+    if start == -1:
+        return []
+    
+    decoder = json.JSONDecoder()
+    items = []
+    pos = start + 1
+    while True:
+        while pos < len(response_text) and response_text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(response_text) or response_text[pos] == "]":
+            return items
+        try:
+            item, pos = decoder.raw_decode(response_text, pos)
+        except json.JSONDecodeError:
+            return items
+        items.append(item)
+
+
+def partial_definition(response_text: str) -> str:
+    """Extract the (possibly still incomplete) definition from a streaming JSON response."""
+    match = _PARTIAL_DEF_RE.search(response_text)
+    if not match:
+        return ""
     
-    return None
+    value = match.group(1)
+    try:
+        return json.loads(f'"{value}"')
+    except json.JSONDecodeError:
+        # A chunk boundary split an escape sequence
+        return value
+
+
+def examples_from_json(data: dict) -> list[str]:
+    """Get the cleaned example sentences from a decoded JSON response."""
+    examples = data.get("examples") or []
+    if not isinstance(examples, list):
+        # A single example sent as a bare string
+        examples = [examples]
+    return [strip_markdown(str(ex).strip()) for ex in examples if str(ex).strip()]
+
+
+def result_from_json(data: dict) -> dict:
+    """Normalize a decoded JSON explanation into the result dict shape."""
+    result = {
+        "definition": strip_markdown(str(data.get("definition") or "")),
+        "examples": examples_from_json(data),
+        "source_context": None
+    }
+    
+    source_context = data.get("source_context")
+    if source_context and "not found" not in str(source_context).lower():
+        result["source_context"] = strip_markdown(str(source_context))
+    
+    return result
 
 
 def parse_response(response_text: str) -> dict:
     """Parse the structured response from Claude."""
+    try:
+        data = load_json(response_text)
+        if isinstance(data, dict):
+            return result_from_json(data)
+    except json.JSONDecodeError:
+        pass
+    
+    # Fallback: the older plain-text DEFINITION/EXAMPLES/SOURCE_CONTEXT format
     result = {
         "definition": "",
         "examples": [],
@@ -104,20 +429,20 @@ def parse_response(response_text: str) -> dict:
     }
     
     # Extract definition
-    def_match = re.search(r'DEFINITION:\s*\n(.+?)(?=\n\nEXAMPLES:|$)', response_text, re.DOTALL)
+    def_match = _DEF_RE.search(response_text)
     if def_match:
         result["definition"] = def_match.group(1).strip()
     
     # Extract examples
-    examples_match = re.search(r'EXAMPLES:\s*\n(.+?)(?=\n\nSOURCE_CONTEXT:|$)', response_text, re.DOTALL)
+    examples_match = _EX_BLOCK_RE.search(response_text)
     if examples_match:
         examples_text = examples_match.group(1)
         # Parse numbered examples
-        examples = re.findall(r'\d+\.\s*(.+?)(?=\n\d+\.|$)', examples_text, re.DOTALL)
+        examples = _EX_ITEM_RE.findall(examples_text)
         result["examples"] = [ex.strip() for ex in examples if ex.strip()]
     
     # Extract source context
-    source_match = re.search(r'SOURCE_CONTEXT:\s*\n(.+?)$', response_text, re.DOTALL)
+    source_match = _SRC_RE.search(response_text)
     if source_match:
         source_text = source_match.group(1).strip()
         if source_text and "not found" not in source_text.lower():
@@ -132,35 +457,66 @@ def parse_response(response_text: str) -> dict:
     return result
 
 
-def get_word_explanation(word: str, source_text: str = "") -> tuple[bool, dict | str]:
+def get_word_explanation(
+    word: str,
+    source_text: str = "",
+    on_text: Callable[[str], None] | None = None,
+    text_index: dict | None = None
+) -> tuple[bool, dict | str]:
     """
     Get an explanation for a word using Claude API.
     
     Args:
         word: The word to explain
         source_text: The original text where the word was found
+        on_text: Optional callback to stream the response; called with the
+            text received so far each time a new chunk arrives
+        text_index: Optional precomputed build_text_index(source_text)
         
     Returns:
         tuple: (success: bool, result: dict with definition/examples/source_context OR error message)
     """
+    # Serve repeat lookups against the same text from the local cache
+    cache_key = explanation_cache_key(word, source_text)
+    cached = get_cached_explanation(cache_key)
+    if cached is not None:
+        return True, cached
+    
     try:
         anthropic_client = get_client()
         
-        # Find the word in context first
-        found_context = find_word_in_context(word, source_text)
+        # Find the word in context first. Only texts long enough to be windowed
+        # need the full index; for short ones find_word_in_context() just walks
+        # out from the match
+        if text_index is None and len(source_text) >= FULL_SOURCE_TEXT_LIMIT:
+            text_index = build_text_index(source_text)
+        found_context = find_word_in_context(word, source_text, text_index)
         
-        user_message = f'Please explain the word "{word}".'
-        if source_text:
-            user_message += f'\n\nSource text where this word was found:\n"""\n{source_text}\n"""'
+        # Only send the passage around the word, not the whole document
+        user_content = build_user_content(
+            f'Please explain the word "{word}".',
+            surrounding_sentences(word, source_text, text_index=text_index)
+        )
         
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": user_message}
+        request = {
+            "model": explain_model(),
+            "max_tokens": MAX_TOKENS,
+            "stop_sequences": STOP_SEQUENCES,
+            "system": SYSTEM_PROMPT,
+            "messages": [
+                {"role": "user", "content": user_content}
             ]
-        )
+        }
+        
+        if on_text is None:
+            response = anthropic_client.messages.create(**request)
+        else:
+            with anthropic_client.messages.stream(**request) as stream:
+                streamed = ""
+                for text in stream.text_stream:
+                    streamed += text
+                    on_text(streamed)
+                response = stream.get_final_message()
         
         response_text = response.content[0].text
         parsed = parse_response(response_text)
@@ -171,49 +527,119 @@ def get_word_explanation(word: str, source_text: str = "") -> tuple[bool, dict |
         
         # Validate we got the essential parts
         if not parsed["definition"]:
-            parsed["definition"] = response_text.split('\n')[0]  # Fallback
+            # Fallback: whatever definition a cut-off JSON reply got to, else the first line
+            parsed["definition"] = partial_definition(response_text) or response_text.split('\n')[0]
         
         if not parsed["examples"]:
             # Try to extract any sentences as examples
             sentences = [s.strip() for s in response_text.split('\n') if s.strip() and len(s) > 20]
             parsed["examples"] = sentences[:3]
         
+        # Only cache complete JSON answers; a reply that was cut off or fell
+        # back to the raw-text parsing above is shown but asked for again
+        if response.stop_reason != "max_tokens" and _is_json_object(response_text):
+            cache_explanation(cache_key, parsed)
         return True, parsed
         
     except ValueError as e:
         return False, str(e)
     except Exception as e:
-        error_msg = str(e)
-        if "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-            return False, "Invalid API key. Please check your ANTHROPIC_API_KEY in the .env file."
-        elif "rate" in error_msg.lower():
-            return False, "Rate limit exceeded. Please wait a moment and try again."
-        else:
-            return False, f"Error calling Claude API: {error_msg}"
+        return False, api_error_message(e)
 
 
-def refresh_examples(word: str, current_definition: str) -> tuple[bool, list | str]:
+def get_word_explanations_batch(
+    words: list[str],
+    source_text: str = "",
+    text_index: dict | None = None
+) -> tuple[bool, list[dict] | str]:
     """
-    Generate new example sentences for a word.
+    Get explanations for several words in a single Claude API call.
     
     Args:
-        word: The word to generate examples for
-        current_definition: The existing definition to maintain consistency
+        words: The words to explain (at most MAX_BATCH_SIZE)
+        source_text: The original text where the words were found
+        text_index: Optional precomputed build_text_index(source_text)
         
     Returns:
-        tuple: (success: bool, examples: list of strings OR error message)
+        tuple: (success: bool, results: list of dicts in the same order as words OR error message)
     """
+    words = words[:MAX_BATCH_SIZE]
+    
+    # Serve repeat lookups against the same text from the local cache
+    results = {word: get_cached_explanation(explanation_cache_key(word, source_text)) for word in words}
+    missing = [word for word in words if results[word] is None]
+    if not missing:
+        return True, [results[word] for word in words]
+    
     try:
         anthropic_client = get_client()
         
-        user_message = f"""The word is "{word}" and its definition is: {current_definition}
+        # Words the model drops (e.g. a response cut off by max_tokens) are
+        # asked for again in another batch; any left after that fall back to
+        # single lookups
+        pending = missing
+        for _ in range(MAX_BATCH_ATTEMPTS):
+            items = _request_batch(anthropic_client, pending, source_text)
+            for word, item in zip(pending, items):
+                if isinstance(item, dict):
+                    parsed = result_from_json(item)
+                else:
+                    parsed = parse_response(str(item))
+                
+                # Use our found context if Claude didn't find it
+                if not parsed["source_context"]:
+                    parsed["source_context"] = find_word_in_context(word, source_text, text_index)
+                
+                # Items that aren't JSON objects are used but not cached
+                if isinstance(item, dict):
+                    cache_explanation(explanation_cache_key(word, source_text), parsed)
+                results[word] = parsed
+            
+            pending = pending[len(items):]
+            if not pending:
+                break
+        
+        for word in pending:
+            success, result = get_word_explanation(word, source_text, text_index=text_index)
+            if not success:
+                return False, result
+            results[word] = result
+        
+        return True, [results[word] for word in words]
+        
+    except ValueError as e:
+        return False, str(e)
+    except Exception as e:
+        return False, api_error_message(e)
+
+
+def _request_batch(anthropic_client: "Anthropic", words: list[str], source_text: str) -> list:
+    """Ask Claude to explain several words; returns the complete items of its JSON array, in order."""
+    word_list = "\n".join(f"{i}. {word}" for i, word in enumerate(words, 1))
+    user_content = build_user_content(f"Please explain each of these words:\n{word_list}", source_text)
+    
+    response = anthropic_client.messages.create(
+        model=explain_model(),
+        max_tokens=MAX_TOKENS * len(words),
+        stop_sequences=STOP_SEQUENCES,
+        system=BATCH_SYSTEM_PROMPT,
+        messages=[
+            {"role": "user", "content": user_content}
+        ]
+    )
+    
+    return load_json_items(response.content[0].text)
+
+
+def build_refresh_request(word: str, current_definition: str) -> dict:
+    """Build the messages.create arguments for a refresh-examples request."""
+    user_message = f"""The word is "{word}" and its definition is: {current_definition}
 
 Please generate 3 NEW and DIFFERENT example sentences using this word in everyday UK/London contexts.
 Do NOT use any markdown formatting - write in plain text only, no bold (**), no italic (*), no headings (#).
-Format your response as:
-1. [First example]
-2. [Second example]
-3. [Third example]
+Respond ONLY with valid JSON on a single line, with no preamble or code fences, in this exact shape:
+{{"examples": ["First example", "Second example", "Third example"]}}
+After the JSON, write END on its own line.
 
 Make these examples different from typical textbook examples - use real London life situations like:
 - Taking the Tube or bus
@@ -223,37 +649,109 @@ Make these examples different from typical textbook examples - use real London l
 - NHS appointments
 - Council communications"""
 
-        response = anthropic_client.messages.create(
-            model="claude-sonnet-4-6",
-            max_tokens=512,
-            system="You are a helpful English tutor specializing in UK/London contexts. Generate practical, relatable example sentences. Do NOT use any markdown formatting - write in plain text only.",
-            messages=[
-                {"role": "user", "content": user_message}
-            ]
-        )
-        
-        response_text = response.content[0].text
-        
-        # Parse numbered examples
-        examples = re.findall(r'\d+\.\s*(.+?)(?=\n\d+\.|$)', response_text, re.DOTALL)
-        examples = [strip_markdown(ex.strip()) for ex in examples if ex.strip()]
-        
-        if not examples:
-            # Fallback: split by newlines
-            examples = [strip_markdown(line.strip()) for line in response_text.split('\n') 
-                       if line.strip() and len(line) > 20][:3]
+    return {
+        "model": refresh_model(),
+        "max_tokens": MAX_TOKENS,
+        "stop_sequences": STOP_SEQUENCES,
+        "system": REFRESH_SYSTEM_PROMPT,
+        "messages": [
+            {"role": "user", "content": user_message}
+        ]
+    }
+
+
+def parse_examples(response_text: str) -> tuple[bool, list | str]:
+    """Parse the example sentences from a refresh-examples response."""
+    try:
+        data = load_json(response_text)
+        if isinstance(data, dict):
+            examples = examples_from_json(data)
+            if examples:
+                return True, examples
+    except json.JSONDecodeError:
+        pass
+    
+    # Fallback: parse numbered examples
+    examples = _EX_ITEM_RE.findall(response_text)
+    examples = [strip_markdown(ex.strip()) for ex in examples if ex.strip()]
+    
+    if not examples:
+        # Fallback: split by newlines
+        examples = [strip_markdown(line.strip()) for line in response_text.split('\n') 
+                   if line.strip() and len(line) > 20][:3]
+    
+    if examples:
+        return True, examples
+    else:
+        return False, "Could not generate new examples. Please try again."
+
+
+def refresh_examples(word: str, current_definition: str) -> tuple[bool, list | str]:
+    """
+    Generate new example sentences for a word.
+    
+    Args:
+        word: The word to generate examples for
+        current_definition: The existing definition to maintain consistency
         
-        if examples:
-            return True, examples
-        else:
-            return False, "Could not generate new examples. Please try again."
+    Returns:
+        tuple: (success: bool, examples: list of strings OR error message)
+    """
+    try:
+        anthropic_client = get_client()
+        response = anthropic_client.messages.create(**build_refresh_request(word, current_definition))
+        return parse_examples(response.content[0].text)
             
     except Exception as e:
         return False, f"Error refreshing examples: {str(e)}"
 
 
+async def _arefresh(
+    anthropic_client: "AsyncAnthropic",
+    semaphore: asyncio.Semaphore,
+    word: str,
+    current_definition: str
+) -> tuple[bool, list | str]:
+    """Async counterpart of refresh_examples, bounded by a shared semaphore."""
+    try:
+        async with semaphore:
+            response = await anthropic_client.messages.create(**build_refresh_request(word, current_definition))
+        return parse_examples(response.content[0].text)
+    
+    except Exception as e:
+        return False, f"Error refreshing examples: {str(e)}"
+
+
+async def refresh_examples_many(pairs: list[tuple[str, str]]) -> list[tuple[bool, list | str]]:
+    """
+    Generate new example sentences for several words concurrently.
+    
+    Args:
+        pairs: (word, current_definition) tuples
+        
+    Returns:
+        list: one (success, examples OR error message) tuple per pair, in order
+    """
+    _load_env_once()
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        return [(False, "ANTHROPIC_API_KEY not found in environment variables")] * len(pairs)
+    
+    # Keep in-flight requests under the API rate limit
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    # The async client is bound to the running event loop, so create one per call
+    from anthropic import AsyncAnthropic
+    async with AsyncAnthropic(api_key=api_key) as anthropic_client:
+        return await asyncio.gather(*[
+            _arefresh(anthropic_client, semaphore, word, definition)
+            for word, definition in pairs
+        ])
+
+
 def check_api_key() -> tuple[bool, str]:
     """Check if the API key is configured and valid."""
+    _load_env_once()
     api_key = os.getenv("ANTHROPIC_API_KEY")
     
     if not api_key:
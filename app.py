@@ -3,9 +3,21 @@ InSitu - Personal English Vocabulary Learning Tool
 Main Streamlit application.
 """
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
 import streamlit as st
-from database import init_db, save_word, get_all_words, search_words, delete_word, get_word_count
-from ai_helper import get_word_explanation, refresh_examples, check_api_key, strip_markdown
+from database import (
+    init_db, save_word, save_words_bulk, list_words_preview, get_word_by_id, get_vocab_version,
+    search_words, delete_words_bulk
+)
+from ai_helper import (
+    get_word_explanation, get_word_explanations_batch, refresh_examples, refresh_examples_many,
+    check_api_key, strip_markdown, partial_definition, build_text_index, source_text_hash,
+    MAX_BATCH_SIZE
+)
 from ocr_helper import extract_text_from_image
 
 # Page configuration
@@ -16,56 +28,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS — uses rgba() semi-transparent backgrounds that adapt
-# automatically to both light and dark Streamlit themes.
-st.markdown("""
-<style>
-    .word-card {
-        background: rgba(76, 175, 80, 0.08);
-        border-radius: 10px;
-        padding: 20px;
-        margin: 10px 0;
-        border-left: 4px solid #4CAF50;
-    }
-    .definition-text {
-        font-size: 1.1em;
-        line-height: 1.6;
-        margin-bottom: 15px;
-    }
-    .example-item {
-        background: rgba(33, 150, 243, 0.08);
-        padding: 10px 15px;
-        margin: 5px 0;
-        border-radius: 5px;
-        border-left: 3px solid #2196F3;
-    }
-    .source-context {
-        background: rgba(255, 193, 7, 0.1);
-        padding: 10px 15px;
-        border-radius: 5px;
-        font-style: italic;
-        margin-top: 10px;
-        border-left: 3px solid #ffc107;
-    }
-    .text-display {
-        background: rgba(128, 128, 128, 0.1);
-        padding: 20px;
-        border-radius: 10px;
-        max-height: 300px;
-        overflow-y: auto;
-        line-height: 1.8;
-        font-size: 1.05em;
-        user-select: text;
-        cursor: text;
-    }
-    .stats-box {
-        background: rgba(33, 150, 243, 0.08);
-        padding: 15px;
-        border-radius: 8px;
-        text-align: center;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS lives in static/style.css (served via enableStaticServing in
+# .streamlit/config.toml), so each rerun only emits a small <link> element
+# instead of re-sending the whole stylesheet.
+CSS_LINK = '<link rel="stylesheet" href="app/static/style.css">'
 
 # Initialize database
 init_db()
@@ -77,38 +43,145 @@ if "current_word" not in st.session_state:
     st.session_state.current_word = ""
 if "word_result" not in st.session_state:
     st.session_state.word_result = None
+if "batch_results" not in st.session_state:
+    st.session_state.batch_results = []
+if "text_index" not in st.session_state:
+    st.session_state.text_index = None
+if "source_hash" not in st.session_state:
+    st.session_state.source_hash = source_text_hash("")
 if "page" not in st.session_state:
     st.session_state.page = "learn"
+if "pending_deletes" not in st.session_state:
+    st.session_state.pending_deletes = set()
+
+
+def inject_css():
+    """Link the custom stylesheet into the page."""
+    st.markdown(CSS_LINK, unsafe_allow_html=True)
+
+
+# Cached vocab bank reads, keyed on the vocab version so any save or delete
+# is picked up on the next render
+@st.cache_data(ttl=60)
+def load_vocab(version: int) -> tuple[int, list[dict]]:
+    """Cached list_words_preview() -> (count, words)."""
+    words = list_words_preview()
+    return len(words), words
+
+
+@st.cache_data(ttl=60)
+def load_search_results(query: str, version: int) -> list[dict]:
+    """Cached search_words(), keyed by the search query."""
+    return search_words(query)
+
+
+@st.cache_resource
+def get_ocr_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for running OCR off the script thread."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+# The API key check only needs to pass once; failures raise LookupError so
+# they aren't cached and a fixed key is picked up on the next rerun
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_api_key_check() -> str:
+    """Cached check_api_key()."""
+    api_ok, api_msg = check_api_key()
+    if not api_ok:
+        raise LookupError(api_msg)
+    return api_msg
+
+
+# In-memory memo of batch explanations, keyed on the words and a hash of the
+# source text (the underscore-prefixed arguments are excluded from Streamlit's
+# cache key). Failed lookups raise LookupError so that errors aren't cached.
+# Single lookups are streamed onto the page, so they can't be memoized here and
+# rely on the SQLite explanation cache instead.
+@st.cache_data(ttl=86400, show_spinner=False, max_entries=256)
+def cached_word_explanations_batch(
+    words: tuple[str, ...],
+    source_hash: str,
+    _source_text: str,
+    _text_index: dict | None
+) -> list[dict]:
+    """Cached get_word_explanations_batch()."""
+    success, results = get_word_explanations_batch(list(words), _source_text, text_index=_text_index)
+    if not success:
+        raise LookupError(results)
+    return results
+
+
+# Button callbacks: they run before the rerun a click triggers, so the new
+# state is rendered straight away without an extra st.rerun()
+def go_to_page(page: str):
+    """Switch to another page."""
+    st.session_state.page = page
+
+
+def clear_text():
+    """Forget the current source text and any lookups made against it."""
+    st.session_state.uploaded_text = ""
+    st.session_state.text_index = None
+    st.session_state.source_hash = source_text_hash("")
+    st.session_state.word_result = None
+    st.session_state.batch_results = []
+
+
+def toggle_pending_delete(word_id: int):
+    """Mark a word for deletion, or unmark it if it already is."""
+    st.session_state.pending_deletes ^= {word_id}
+
+
+def apply_pending_deletes():
+    """Delete every word marked for deletion in one transaction."""
+    success, result = delete_words_bulk(list(st.session_state.pending_deletes))
+    if success:
+        st.session_state.pending_deletes = set()
+        st.toast(f"✅ Deleted {result} word{'s' if result != 1 else ''}")
+    else:
+        st.toast(f"⚠️ {result}")
+
+
+def clear_pending_deletes():
+    """Unmark every word marked for deletion."""
+    st.session_state.pending_deletes = set()
 
 
 def render_sidebar():
-    """Render the sidebar navigation."""
-    with st.sidebar:
-        st.title("📖 InSitu")
-        st.caption("*Learn from the words you encounter in real life*")
-        
-        st.divider()
-        
-        # Navigation
-        if st.button("📖 Learn", use_container_width=True, 
-                    type="primary" if st.session_state.page == "learn" else "secondary"):
-            st.session_state.page = "learn"
-            st.rerun()
-            
-        if st.button("📚 Vocab Bank", use_container_width=True,
-                    type="primary" if st.session_state.page == "vocab" else "secondary"):
-            st.session_state.page = "vocab"
-            st.rerun()
-        
-        st.divider()
+    """
+    Render the sidebar navigation.
+    
+    Not a fragment: navigation has to rerun the whole app, and the button
+    callbacks set the page before that single rerun.
+    """
+    st.title("📖 InSitu")
+    st.caption("*Learn from the words you encounter in real life*")
+    
+    st.divider()
+    
+    # Navigation
+    st.button("📖 Learn", use_container_width=True,
+              type="primary" if st.session_state.page == "learn" else "secondary",
+              on_click=go_to_page, args=("learn",))
         
-        # Word count
-        word_count = get_word_count()
-        st.metric("Words Saved", word_count)
+    st.button("📚 Vocab Bank", use_container_width=True,
+              type="primary" if st.session_state.page == "vocab" else "secondary",
+              on_click=go_to_page, args=("vocab",))
+    
+    st.divider()
+    
+    # Word count
+    word_count, _ = load_vocab(get_vocab_version())
+    st.metric("Words Saved", word_count)
 
 
-def render_word_card(word: str, result: dict):
-    """Render the word explanation card."""
+@st.fragment
+def render_word_card(word: str, result: dict, key: str = "main"):
+    """
+    Render the word explanation card.
+    
+    Runs as a fragment, so refreshing examples only reruns this card.
+    """
     st.markdown("---")
     st.subheader(f"📝 {word.capitalize()}")
     
@@ -130,12 +203,14 @@ def render_word_card(word: str, result: dict):
                     unsafe_allow_html=True)
     
     # Refresh examples button only (Save is automatic now)
-    if st.button("🔄 Refresh Examples", key="refresh_btn"):
+    # Kept inline rather than as an on_click callback: callbacks of a fragment
+    # can't display elements, and the spinner belongs in the card
+    if st.button("🔄 Refresh Examples", key=f"refresh_btn_{key}"):
         with st.spinner("Generating new examples..."):
             success, new_examples = refresh_examples(word, result["definition"])
             if success:
-                st.session_state.word_result["examples"] = new_examples
-                st.rerun()
+                result["examples"] = new_examples
+                st.rerun(scope="fragment")
             else:
                 st.error(new_examples)
 
@@ -145,9 +220,10 @@ def render_learn_page():
     st.header("📖 Learn New Words")
     
     # Check API key
-    api_ok, api_msg = check_api_key()
-    if not api_ok:
-        st.error(api_msg)
+    try:
+        cached_api_key_check()
+    except LookupError as e:
+        st.error(str(e))
         st.info("Create a `.env` file in the app directory with your API key:\n```\nANTHROPIC_API_KEY=your_key_here\n```")
         return
     
@@ -167,8 +243,10 @@ def render_learn_page():
         if st.button("Submit Text", key="submit_text"):
             if text_input.strip():
                 st.session_state.uploaded_text = text_input.strip()
+                st.session_state.text_index = build_text_index(st.session_state.uploaded_text)
+                st.session_state.source_hash = source_text_hash(st.session_state.uploaded_text)
                 st.session_state.word_result = None
-                st.rerun()
+                st.session_state.batch_results = []
     
     with col2:
         st.markdown("**Option B: Upload Image**")
@@ -179,14 +257,26 @@ def render_learn_page():
         )
         if uploaded_file is not None:
             if st.button("Extract Text", key="extract_text"):
-                with st.spinner("Extracting text from image..."):
-                    success, result = extract_text_from_image(uploaded_file)
-                    if success:
-                        st.session_state.uploaded_text = result
-                        st.session_state.word_result = None
-                        st.rerun()
-                    else:
-                        st.error(result)
+                with st.status("Extracting text from image...") as status:
+                    # Run Tesseract on a worker thread so the status element keeps
+                    # updating while OCR runs
+                    future = get_ocr_executor().submit(extract_text_from_image, uploaded_file)
+                    while not future.done():
+                        time.sleep(0.1)
+                    success, result = future.result()
+                    status.update(
+                        label="Text extracted" if success else "Could not extract text",
+                        state="complete" if success else "error"
+                    )
+                if success:
+                    st.session_state.uploaded_text = result
+                    st.session_state.text_index = build_text_index(result)
+                    st.session_state.source_hash = source_text_hash(result)
+                    st.session_state.word_result = None
+                    st.session_state.batch_results = []
+                else:
+                    # Outside the (collapsed) status box so the error is in plain view
+                    st.error(result)
     
     # Display uploaded/extracted text
     if st.session_state.uploaded_text:
@@ -206,10 +296,7 @@ def render_learn_page():
         col1, col2 = st.columns([1, 3])
         
         with col1:
-            if st.button("🗑️ Clear Text", key="clear_text"):
-                st.session_state.uploaded_text = ""
-                st.session_state.word_result = None
-                st.rerun()
+            st.button("🗑️ Clear Text", key="clear_text", on_click=clear_text)
         
         # Word lookup section
         st.markdown("---")
@@ -228,13 +315,26 @@ def render_learn_page():
                 st.session_state.current_word = word
                 
                 with st.spinner(f"Looking up '{word}'..."):
+                    # Stream the explanation so the definition appears as it is generated
+                    placeholder = st.empty()
+                    
+                    def on_text(text):
+                        definition = partial_definition(text)
+                        if definition:
+                            placeholder.markdown(f'<div class="definition-text">{definition}</div>',
+                                                 unsafe_allow_html=True)
+                    
                     success, result = get_word_explanation(
                         word,
-                        st.session_state.uploaded_text
+                        st.session_state.uploaded_text,
+                        on_text=on_text,
+                        text_index=st.session_state.text_index
                     )
+                    placeholder.empty()
                     
                     if success:
                         st.session_state.word_result = result
+                        st.session_state.batch_results = []
                         
                         # Auto-save to vocab bank
                         save_success, save_msg = save_word(
@@ -246,16 +346,93 @@ def render_learn_page():
                             st.toast(f"✅ '{word}' saved to your vocab bank!")
                         else:
                             st.toast(f"ℹ️ {save_msg}")
-                        st.rerun()
                     else:
                         st.error(result)
                         st.session_state.word_result = None
             else:
                 st.warning("Please type a word to look up.")
         
+        # Batch lookup: several words in one request
+        with st.expander("Look up multiple words"):
+            batch_input = st.text_area(
+                f"One word per line (up to {MAX_BATCH_SIZE})",
+                height=120,
+                key="word_lookup_batch"
+            )
+            
+            if st.button("🔍 Look Up All", key="lookup_batch_btn"):
+                words = list(dict.fromkeys(
+                    line.strip().lower() for line in batch_input.splitlines() if line.strip()
+                ))
+                if not words:
+                    st.warning("Please type at least one word to look up.")
+                else:
+                    if len(words) > MAX_BATCH_SIZE:
+                        st.warning(f"Only the first {MAX_BATCH_SIZE} words will be looked up.")
+                        words = words[:MAX_BATCH_SIZE]
+                    
+                    with st.spinner(f"Looking up {len(words)} words..."):
+                        try:
+                            results = cached_word_explanations_batch(
+                                tuple(words),
+                                st.session_state.source_hash,
+                                st.session_state.uploaded_text,
+                                st.session_state.text_index
+                            )
+                            success = True
+                        except LookupError as e:
+                            success, results = False, str(e)
+                    
+                    if success:
+                        st.session_state.word_result = None
+                        st.session_state.batch_results = list(zip(words, results))
+                        
+                        # Auto-save to vocab bank
+                        save_success, saved = save_words_bulk([
+                            (word, result["definition"], result.get("source_context"))
+                            for word, result in st.session_state.batch_results
+                        ])
+                        if save_success:
+                            st.toast(f"✅ {saved} new word(s) saved to your vocab bank!")
+                        else:
+                            st.toast(f"ℹ️ {saved}")
+                    else:
+                        st.error(results)
+                        st.session_state.batch_results = []
+        
         # Display word result
         if st.session_state.word_result:
             render_word_card(st.session_state.current_word, st.session_state.word_result)
+        
+        if st.session_state.batch_results:
+            if st.button("🔄 Refresh All Examples", key="refresh_all_btn"):
+                with st.spinner("Generating new examples..."):
+                    refreshed = asyncio.run(refresh_examples_many([
+                        (word, result["definition"]) for word, result in st.session_state.batch_results
+                    ]))
+                for (word, result), (success, new_examples) in zip(st.session_state.batch_results, refreshed):
+                    if success:
+                        result["examples"] = new_examples
+                    else:
+                        st.error(f"{word}: {new_examples}")
+        
+        for i, (word, result) in enumerate(st.session_state.batch_results):
+            render_word_card(word, result, key=f"batch_{i}")
+
+
+def truncate_definition(definition: str | None, truncated: bool) -> str:
+    """
+    Shorten a definition for the vocab list (markdown stripped for clean display).
+    
+    Preview rows arrive already cut to PREVIEW_LENGTH characters by the query,
+    with truncated set when the stored definition was longer; markdown is
+    stripped before cutting to 80 so a marker split at the query's cut is
+    never shown.
+    """
+    definition = strip_markdown(definition or "")
+    if truncated or len(definition) > 80:
+        return definition[:80] + "..."
+    return definition
 
 
 def render_vocab_bank_page():
@@ -263,7 +440,8 @@ def render_vocab_bank_page():
     st.header("📚 Vocab Bank")
     
     # Stats
-    word_count = get_word_count()
+    version = get_vocab_version()
+    word_count, all_words = load_vocab(version)
     st.markdown(f'<div class="stats-box">📚 You have <strong>{word_count}</strong> words in your vocab bank</div>', 
                 unsafe_allow_html=True)
     
@@ -274,81 +452,93 @@ def render_vocab_bank_page():
     st.markdown("---")
     
     # Search/filter
-    search_query = st.text_input("🔍 Search words", placeholder="Type to filter...", key="vocab_search")
+    search_query = st.text_input("🔍 Search words", placeholder="Type a word or part of a definition...", key="vocab_search")
     
     # Get words
     if search_query:
-        words = search_words(search_query)
+        words = load_search_results(search_query, version)
     else:
-        words = get_all_words()
+        words = all_words
+    
+    # Words marked for deletion are only removed, in one batch, when applied
+    pending_deletes = st.session_state.pending_deletes
+    if pending_deletes:
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.button(f"🗑️ Apply deletes ({len(pending_deletes)})", key="apply_deletes",
+                      type="primary", on_click=apply_pending_deletes)
+        with col2:
+            st.button("Unmark all", key="clear_deletes", on_click=clear_pending_deletes)
     
     if not words:
         st.info("No words found matching your search.")
         return
     
-    # Display words in a table-like format
-    for word_data in words:
-        with st.container():
-            col1, col2, col3, col4, col5 = st.columns([2, 4, 2, 1, 1])
-            
-            with col1:
-                st.markdown(f"**{word_data['word'].capitalize()}**")
-            
-            with col2:
-                # Truncate definition (strip markdown for clean display)
-                definition = strip_markdown(word_data['definition'] or "")
-                truncated = definition[:80] + "..." if len(definition) > 80 else definition
-                st.markdown(truncated)
-            
-            with col3:
-                # Format date
-                date_str = word_data['date_added']
-                if date_str:
-                    try:
-                        date_display = date_str.split()[0]  # Just the date part
-                    except (AttributeError, IndexError):
-                        date_display = str(date_str)
-                else:
-                    date_display = "N/A"
-                st.caption(f"Added: {date_display}")
-            
-            with col4:
-                st.caption(f"Reviews: {word_data['review_count']}")
-            
-            with col5:
-                if st.button("🗑️", key=f"delete_{word_data['id']}", help="Delete word"):
-                    success, message = delete_word(word_data['id'])
-                    if success:
-                        st.toast(f"✅ Word deleted")
-                        st.rerun()
-                    else:
-                        st.error(message)
-            
-            st.divider()
+    # Render the whole list as a single table; selecting a row shows its
+    # details and the delete action below
+    table = pd.DataFrame(words, columns=["word", "definition", "date_added", "review_count"])
+    table.insert(0, "pending_delete", [word["id"] in pending_deletes for word in words])
+    table["word"] = table["word"].str.capitalize()
+    table["definition"] = [
+        truncate_definition(word["definition"], bool(word["truncated"])) for word in words
+    ]
+    table["date_added"] = table["date_added"].fillna("N/A")
+    event = st.dataframe(
+        table,
+        column_config={
+            "pending_delete": st.column_config.CheckboxColumn("🗑️", width="small"),
+            "word": st.column_config.TextColumn("Word", width="small"),
+            "definition": st.column_config.TextColumn("Definition", width="large"),
+            "date_added": st.column_config.TextColumn("Added", width="small"),
+            "review_count": st.column_config.NumberColumn("Reviews", width="small")
+        },
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        # Selections are row positions, so start a fresh table whenever the
+        # rows can change (words saved/deleted, or a different search)
+        key=f"vocab_table_{version}_{search_query}"
+    )
     
-    # Expandable details for each word
+    selected_rows = [row for row in event.selection.rows if row < len(words)]
+    if not selected_rows:
+        st.caption("Select a word in the table to see full details")
+        return
+    
+    # Details for the selected word; the list only holds previews, so the
+    # full record is loaded just for this one row
+    word_data = get_word_by_id(words[selected_rows[0]]["id"])
+    if word_data is None:
+        st.info("This word is no longer in your vocab bank.")
+        return
     st.markdown("---")
-    st.markdown("### Word Details")
-    st.caption("Click on a word below to see full details")
+    st.subheader(f"📝 {word_data['word'].capitalize()}")
+    clean_def = strip_markdown(word_data['definition'] or "")
+    st.markdown(f"**Definition:** {clean_def}")
+    if word_data.get('source_context'):
+        clean_ctx = strip_markdown(word_data['source_context'])
+        st.markdown(f"**Original context:** {clean_ctx}")
+    st.caption(f"Status: {word_data['status']} | Reviews: {word_data['review_count']} | Next review: {word_data['next_review_date']}")
     
-    for word_data in words:
-        with st.expander(f"📝 {word_data['word'].capitalize()}"):
-            clean_def = strip_markdown(word_data['definition'] or "")
-            st.markdown(f"**Definition:** {clean_def}")
-            if word_data.get('source_context'):
-                clean_ctx = strip_markdown(word_data['source_context'])
-                st.markdown(f"**Original context:** {clean_ctx}")
-            st.caption(f"Status: {word_data['status']} | Reviews: {word_data['review_count']} | Next review: {word_data['next_review_date']}")
+    marked = word_data['id'] in pending_deletes
+    st.button("↩️ Unmark for deletion" if marked else "🗑️ Mark for deletion", key="delete_selected",
+              on_click=toggle_pending_delete, args=(word_data['id'],))
 
 
 def main():
     """Main application entry point."""
-    render_sidebar()
+    inject_css()
     
     if st.session_state.page == "learn":
         render_learn_page()
     elif st.session_state.page == "vocab":
         render_vocab_bank_page()
+    
+    # Rendered after the page so the word count includes anything the page
+    # just saved or deleted (the sidebar's layout doesn't depend on call order)
+    with st.sidebar:
+        render_sidebar()
 
 
 if __name__ == "__main__":
@@ -3,56 +3,186 @@ Database module for InSitu vocabulary app.
 Handles SQLite connection and CRUD operations for the vocab bank.
 """
 
+import json
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 
 DATABASE_PATH = Path(__file__).parent / "vocab.db"
 
 
+# Shared connection, created on first use and reused for the life of the process
+connection = None
+
+# Bumped on every change to the words table, so callers can key caches on it
+vocab_version = 0
+
+# Set by init_db() when SQLite was built with FTS5; search_words() falls back
+# to a LIKE scan without it
+fts_enabled = False
+
+# Set once init_db() has created the schema; Streamlit calls init_db() on every
+# rerun, so later calls return straight away
+db_initialized = False
+
+# Trigram FTS5 can only match queries at least this long
+FTS_MIN_QUERY_LENGTH = 3
+
+# Characters of each definition loaded for the vocab list. The list shows 80
+# after stripping markdown; loading more means a marker split at the cut
+# (e.g. "**fru") falls beyond what is shown once the rest is stripped
+PREVIEW_LENGTH = 160
+
+# Explanations kept in the explanation_cache table; the oldest are dropped first
+EXPLANATION_CACHE_SIZE = 2000
+
+# Streamlit runs each session on its own thread; guards creating the shared
+# connection and every write to it, so a single write can't land inside (and
+# be rolled back with) another thread's multi-statement transaction
+db_lock = threading.Lock()
+
+
 def get_connection():
-    """Get a database connection with row factory enabled."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get the shared database connection, creating it on first use."""
+    global connection
+    with db_lock:
+        if connection is None:
+            # Keep more prepared statements around than the default 128 so the
+            # queries each rerun issues never have to be re-parsed
+            conn = sqlite3.connect(
+                DATABASE_PATH,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=256,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            connection = conn
+        return connection
+
+
+def _bump_vocab_version():
+    """Record that the words table changed."""
+    global vocab_version
+    with db_lock:
+        vocab_version += 1
+
+
+def get_vocab_version() -> int:
+    """Get the current vocab version; it changes whenever words are saved or deleted."""
+    return vocab_version
 
 
 def init_db():
-    """Initialize the database with the words table."""
+    """Initialize the database with the words table (once per process)."""
+    global db_initialized
+    if db_initialized:
+        return
+    
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS words (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            word TEXT NOT NULL UNIQUE,
-            definition TEXT,
-            source_context TEXT,
-            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            next_review_date DATE DEFAULT (DATE('now', '+1 day')),
-            review_count INTEGER DEFAULT 0,
-            ease_factor REAL DEFAULT 2.5,
-            status TEXT DEFAULT 'learning'
-        )
+    
+    with db_lock:
+        if db_initialized:
+            return
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS words (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                word TEXT NOT NULL COLLATE NOCASE,
+                definition TEXT,
+                source_context TEXT,
+                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                next_review_date DATE DEFAULT (DATE('now', '+1 day')),
+                review_count INTEGER DEFAULT 0,
+                ease_factor REAL DEFAULT 2.5,
+                status TEXT DEFAULT 'learning'
+            )
+        """)
+        
+        # Case-insensitive unique index for word lookups. It is the only index
+        # on word: the column isn't declared UNIQUE, which would add a second,
+        # identical autoindex (databases created before this keep their old
+        # case-sensitive one)
+        conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_words_word_nocase
+            ON words(word COLLATE NOCASE)
+        """)
+        
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS explanation_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        _init_fts(conn)
+        db_initialized = True
+
+
+def _init_fts(conn):
+    """
+    Create the words_fts full-text index over words.word and words.definition,
+    kept in sync by triggers. Uses the trigram tokenizer so a MATCH behaves
+    like a case-insensitive substring search.
+    """
+    global fts_enabled
+    existed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'words_fts'"
+    ).fetchone() is not None
+    
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+                word, definition,
+                content='words', content_rowid='id', tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 (or too old for the trigram tokenizer)
+        fts_enabled = False
+        return
+    
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS words_fts_ai AFTER INSERT ON words BEGIN
+            INSERT INTO words_fts (rowid, word, definition)
+            VALUES (new.id, new.word, new.definition);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS words_fts_ad AFTER DELETE ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, definition)
+            VALUES ('delete', old.id, old.word, old.definition);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS words_fts_au AFTER UPDATE ON words BEGIN
+            INSERT INTO words_fts (words_fts, rowid, word, definition)
+            VALUES ('delete', old.id, old.word, old.definition);
+            INSERT INTO words_fts (rowid, word, definition)
+            VALUES (new.id, new.word, new.definition);
+        END
     """)
     
-    conn.commit()
-    conn.close()
+    # Index words saved before the full-text table existed
+    if not existed:
+        conn.execute("INSERT INTO words_fts (words_fts) VALUES ('rebuild')")
+    
+    fts_enabled = True
 
 
 def word_exists(word: str) -> bool:
     """Check if a word already exists in the database (case-insensitive)."""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT 1 FROM words WHERE LOWER(word) = LOWER(?) LIMIT 1",
+    row = conn.execute(
+        "SELECT 1 FROM words WHERE word = ? COLLATE NOCASE LIMIT 1",
         (word,)
-    )
-    exists = cursor.fetchone() is not None
+    ).fetchone()
     
-    conn.close()
-    return exists
+    return row is not None
 
 
 def save_word(word: str, definition: str, source_context: str | None = None) -> tuple[bool, str]:
@@ -62,64 +192,158 @@ def save_word(word: str, definition: str, source_context: str | None = None) ->
     Returns:
         tuple: (success: bool, message: str)
     """
-    if word_exists(word):
-        return False, "This word is already in your vocab bank"
-    
     conn = get_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            """
-            INSERT INTO words (word, definition, source_context)
-            VALUES (?, ?, ?)
-            """,
-            (word.lower(), definition, source_context)
-        )
-        conn.commit()
-        return True, f"'{word}' saved to your vocab bank!"
+        # One statement: the case-insensitive unique index rejects duplicates
+        with db_lock:
+            cursor = conn.execute(
+                """
+                INSERT OR IGNORE INTO words (word, definition, source_context)
+                VALUES (?, ?, ?)
+                """,
+                (word.lower(), definition, source_context)
+            )
     except sqlite3.Error as e:
         return False, f"Database error: {str(e)}"
-    finally:
-        conn.close()
+    
+    if cursor.rowcount == 0:
+        return False, "This word is already in your vocab bank"
+    _bump_vocab_version()
+    return True, f"'{word}' saved to your vocab bank!"
 
 
+def save_words_bulk(rows: list[tuple[str, str, str | None]]) -> tuple[bool, int | str]:
+    """
+    Save several words to the vocab bank in a single transaction.
+    
+    Args:
+        rows: (word, definition, source_context) tuples; words already in
+            the vocab bank are skipped
+        
+    Returns:
+        tuple: (success: bool, number of words saved OR error message)
+    """
+    conn = get_connection()
+    
+    with db_lock:
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.executemany(
+                """
+                INSERT OR IGNORE INTO words (word, definition, source_context)
+                VALUES (?, ?, ?)
+                """,
+                [(word.lower(), definition, source_context) for word, definition, source_context in rows]
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return False, f"Database error: {str(e)}"
+    
+    saved = max(cursor.rowcount, 0)
+    if saved:
+        _bump_vocab_version()
+    return True, saved
+
+
+# Word reads return dates as 'YYYY-MM-DD' text formatted by SQLite, and order
+# by the stored timestamp (words.date_added) rather than that date-only alias
+
 def get_all_words() -> list[dict]:
     """Get all words from the vocab bank."""
     conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, word, definition, source_context, date_added, 
-               next_review_date, review_count, ease_factor, status
+    rows = conn.execute("""
+        SELECT id, word, definition, source_context,
+               strftime('%Y-%m-%d', date_added) AS date_added,
+               strftime('%Y-%m-%d', next_review_date) AS next_review_date,
+               review_count, ease_factor, status
         FROM words
-        ORDER BY date_added DESC
-    """)
+        ORDER BY words.date_added DESC
+    """).fetchall()
     
-    rows = cursor.fetchall()
-    conn.close()
+    return [dict(row) for row in rows]
+
+
+def list_words_preview() -> list[dict]:
+    """
+    Get every word for the vocab list, with definitions cut down in SQL.
+    
+    Returns:
+        list of dicts (id, word, definition, date_added, review_count,
+        truncated), newest first; definition holds at most the first
+        PREVIEW_LENGTH characters and truncated says whether anything was
+        cut off
+    """
+    conn = get_connection()
+    rows = conn.execute("""
+        SELECT id, word, substr(definition, 1, ?) AS definition,
+               length(definition) > ? AS truncated,
+               strftime('%Y-%m-%d', date_added) AS date_added, review_count
+        FROM words
+        ORDER BY words.date_added DESC
+    """, (PREVIEW_LENGTH, PREVIEW_LENGTH)).fetchall()
     
     return [dict(row) for row in rows]
 
 
+def get_word_by_id(word_id: int) -> dict | None:
+    """Get the full record for one word, or None if it doesn't exist."""
+    conn = get_connection()
+    row = conn.execute(
+        """
+        SELECT id, word, definition, source_context,
+               strftime('%Y-%m-%d', date_added) AS date_added,
+               strftime('%Y-%m-%d', next_review_date) AS next_review_date,
+               review_count, ease_factor, status
+        FROM words
+        WHERE id = ?
+        """,
+        (word_id,)
+    ).fetchone()
+    
+    return dict(row) if row else None
+
+
 def search_words(query: str) -> list[dict]:
-    """Search words by partial match (case-insensitive)."""
+    """
+    Search words by partial match (case-insensitive) in the word or its
+    definition, best matches first.
+    
+    Uses the words_fts index; queries too short for it (or databases without
+    FTS5) fall back to a LIKE scan of the same two columns.
+    
+    Returns:
+        list of dicts shaped like list_words_preview() rows
+    """
     conn = get_connection()
-    cursor = conn.cursor()
+    if fts_enabled and len(query) >= FTS_MIN_QUERY_LENGTH:
+        # Quote the query so FTS5 treats it as a literal string
+        rows = conn.execute(
+            """
+            SELECT w.id, w.word, substr(w.definition, 1, ?) AS definition,
+                   length(w.definition) > ? AS truncated,
+                   strftime('%Y-%m-%d', w.date_added) AS date_added, w.review_count
+            FROM words_fts f
+            JOIN words w ON w.id = f.rowid
+            WHERE words_fts MATCH ?
+            ORDER BY f.rank
+            """,
+            (PREVIEW_LENGTH, PREVIEW_LENGTH, '"' + query.replace('"', '""') + '"')
+        ).fetchall()
+        return [dict(row) for row in rows]
     
-    cursor.execute(
+    rows = conn.execute(
         """
-        SELECT id, word, definition, source_context, date_added,
-               next_review_date, review_count, ease_factor, status
+        SELECT id, word, substr(definition, 1, ?) AS definition,
+               length(definition) > ? AS truncated,
+               strftime('%Y-%m-%d', date_added) AS date_added, review_count
         FROM words
-        WHERE LOWER(word) LIKE LOWER(?)
-        ORDER BY date_added DESC
+        WHERE word LIKE ? OR definition LIKE ?
+        ORDER BY words.date_added DESC
         """,
-        (f"%{query}%",)
-    )
-    
-    rows = cursor.fetchall()
-    conn.close()
+        (PREVIEW_LENGTH, PREVIEW_LENGTH, f"%{query}%", f"%{query}%")
+    ).fetchall()
     
     return [dict(row) for row in rows]
 
@@ -132,29 +356,90 @@ def delete_word(word_id: int) -> tuple[bool, str]:
         tuple: (success: bool, message: str)
     """
     conn = get_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute("DELETE FROM words WHERE id = ?", (word_id,))
-        conn.commit()
-        
-        if cursor.rowcount > 0:
-            return True, "Word deleted successfully"
-        else:
-            return False, "Word not found"
+        with db_lock:
+            cursor = conn.execute("DELETE FROM words WHERE id = ?", (word_id,))
     except sqlite3.Error as e:
         return False, f"Database error: {str(e)}"
-    finally:
-        conn.close()
+    
+    if cursor.rowcount > 0:
+        _bump_vocab_version()
+        return True, "Word deleted successfully"
+    else:
+        return False, "Word not found"
+
+
+def delete_words_bulk(word_ids: list[int]) -> tuple[bool, int | str]:
+    """
+    Delete several words from the vocab bank in a single transaction.
+    
+    Returns:
+        tuple: (success: bool, number of words deleted OR error message)
+    """
+    conn = get_connection()
+    
+    with db_lock:
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.executemany(
+                "DELETE FROM words WHERE id = ?",
+                [(word_id,) for word_id in word_ids]
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return False, f"Database error: {str(e)}"
+    
+    deleted = max(cursor.rowcount, 0)
+    if deleted:
+        _bump_vocab_version()
+    return True, deleted
 
 
 def get_word_count() -> int:
     """Get the total number of words in the vocab bank."""
     conn = get_connection()
-    cursor = conn.cursor()
+    count = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
     
-    cursor.execute("SELECT COUNT(*) FROM words")
-    count = cursor.fetchone()[0]
-    
-    conn.close()
     return count
+
+
+def get_cached_explanation(cache_key: str) -> dict | None:
+    """Get a cached word explanation, or None if it isn't cached."""
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT result FROM explanation_cache WHERE cache_key = ?",
+            (cache_key,)
+        ).fetchone()
+        return json.loads(row["result"]) if row else None
+    except (sqlite3.Error, ValueError):
+        return None
+
+
+def cache_explanation(cache_key: str, result: dict) -> None:
+    """
+    Store a word explanation in the cache, replacing any older entry.
+    
+    Keeps at most EXPLANATION_CACHE_SIZE entries; INSERT OR REPLACE gives
+    every write a new rowid, so the lowest rowids are the oldest entries.
+    """
+    conn = get_connection()
+    try:
+        with db_lock:
+            conn.execute(
+                "INSERT OR REPLACE INTO explanation_cache (cache_key, result) VALUES (?, ?)",
+                (cache_key, json.dumps(result))
+            )
+            conn.execute(
+                """
+                DELETE FROM explanation_cache WHERE rowid IN (
+                    SELECT rowid FROM explanation_cache
+                    ORDER BY rowid DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (EXPLANATION_CACHE_SIZE,)
+            )
+    except sqlite3.Error:
+        pass
@@ -3,32 +3,93 @@ OCR module for InSitu vocabulary app.
 Handles image-to-text extraction using pytesseract.
 """
 
-from PIL import Image
+from PIL import Image, ImageOps
 import pytesseract
+import functools
+import hashlib
 import io
+import math
+import threading
+
+# Longest image side passed to Tesseract; larger phone photos are downscaled
+MAX_OCR_DIMENSION = 2000
+
+# LSTM engine, treating the image as a single uniform block of text
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+
+
+# Maximum number of OCR results kept in memory
+OCR_CACHE_SIZE = 32
+
+# Successful OCR results keyed by the SHA-1 digest of the image bytes
+_ocr_cache: dict[bytes, str] = {}
+
+# OCR runs on a worker pool, so every read and write of _ocr_cache holds this
+# (OCR itself runs outside it)
+_ocr_cache_lock = threading.Lock()
 
 
 def extract_text_from_image(uploaded_file) -> tuple[bool, str]:
     """
     Extract text from an uploaded image file using OCR.
     
+    Results are cached by image content, so extracting the same image
+    again returns immediately.
+    
     Args:
         uploaded_file: Streamlit UploadedFile object
         
     Returns:
         tuple: (success: bool, text_or_error: str)
     """
+    image_bytes = uploaded_file.getvalue()
+    digest = hashlib.sha1(image_bytes).digest()
+    
+    with _ocr_cache_lock:
+        cached = _ocr_cache.get(digest)
+    if cached is not None:
+        return True, cached
+    
+    success, result = _ocr_bytes(image_bytes)
+    if success:
+        with _ocr_cache_lock:
+            if digest not in _ocr_cache and len(_ocr_cache) >= OCR_CACHE_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                _ocr_cache.pop(next(iter(_ocr_cache)))
+            _ocr_cache[digest] = result
+    return success, result
+
+
+def _ocr_bytes(image_bytes: bytes) -> tuple[bool, str]:
+    """Run OCR on raw image bytes; see extract_text_from_image."""
     try:
-        # Read the image from the uploaded file
-        image_bytes = uploaded_file.read()
+        # BytesIO shares the bytes buffer rather than copying it
         image = Image.open(io.BytesIO(image_bytes))
         
+        # For JPEGs, let libjpeg decode straight to grayscale at a reduced
+        # scale instead of decoding full size and shrinking afterwards. Pillow
+        # picks the scale per axis, so the requested size has to keep the
+        # aspect ratio; a square box would leave a 4:3 photo at full size.
+        if max(image.size) > MAX_OCR_DIMENSION:
+            ratio = MAX_OCR_DIMENSION / max(image.size)
+            draft_size = (math.ceil(image.size[0] * ratio), math.ceil(image.size[1] * ratio))
+        else:
+            draft_size = image.size
+        image.draft('L', draft_size)
+        
         # Convert to RGB if necessary (handles PNG with transparency)
         if image.mode in ('RGBA', 'P'):
             image = image.convert('RGB')
         
+        # Grayscale, downscale and stretch contrast before OCR; Tesseract's
+        # time is roughly linear in the number of pixels it processes
+        image = image.convert('L')
+        if max(image.size) > MAX_OCR_DIMENSION:
+            image.thumbnail((MAX_OCR_DIMENSION, MAX_OCR_DIMENSION), Image.LANCZOS)
+        image = ImageOps.autocontrast(image)
+        
         # Extract text using pytesseract
-        extracted_text = pytesseract.image_to_string(image)
+        extracted_text = pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
         
         # Clean up the text
         extracted_text = extracted_text.strip()
@@ -49,8 +110,9 @@ def extract_text_from_image(uploaded_file) -> tuple[bool, str]:
         return False, f"Error processing image: {str(e)}"
 
 
+@functools.lru_cache(maxsize=1)
 def is_tesseract_available() -> bool:
-    """Check if Tesseract is available on the system."""
+    """Check if Tesseract is available on the system (checked once per process)."""
     try:
         pytesseract.get_tesseract_version()
         return True